@@ -1,7 +1,18 @@
-"""FastAPI routes for PromptLab"""
+"""FastAPI routes for PromptLab
 
-from fastapi import FastAPI, HTTPException
+Handlers are declared ``async def`` so FastAPI runs them directly on the
+event loop instead of dispatching each one to its threadpool. That is only
+safe because the storage layer is in-memory and never blocks; if it is ever
+backed by blocking I/O, these handlers must go back to plain ``def`` (or
+wrap the storage calls in ``run_in_threadpool``).
+"""
+
+import os
+
+import orjson
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from typing import Optional
 
 from app.models import (
@@ -11,59 +22,92 @@ from app.models import (
     get_current_time
 )
 from app.storage import storage
-from app.utils import sort_prompts_by_date, filter_prompts_by_collection, search_prompts
 from app import __version__
 
 
 app = FastAPI(
     title="PromptLab API",
     description="AI Prompt Engineering Platform",
-    version=__version__
+    version=__version__,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# PROMPTLAB_CORS_ORIGINS is a comma-separated list of allowed origins (a
+# wildcard can't be combined with credentials). Set it to an empty string
+# when a reverse proxy adds the CORS headers, to skip the middleware.
+CORS_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv(
+        "PROMPTLAB_CORS_ORIGINS", "http://localhost:3000,http://localhost:5173"
+    ).split(",")
+    if origin.strip()
+]
+
+if CORS_ORIGINS:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["ETag"],
+    )
+
+
+def _strip_weak(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Check the request's If-None-Match header against an ETag, using weak
+    comparison (RFC 9110 section 13.1.2): the W/ prefix is ignored."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    candidates = [_strip_weak(tag.strip()) for tag in header.split(",")]
+    return _strip_weak(etag) in candidates or "*" in candidates
 
 
 # ============== Health Check ==============
 
+# The health payload never changes while the process runs, so it is
+# serialized once at import time
+_HEALTH_BODY = orjson.dumps(HealthResponse(status="healthy", version=__version__).model_dump())
+
+
 @app.get("/health", response_model=HealthResponse)
-def health_check():
-    return HealthResponse(status="healthy", version=__version__)
+async def health_check():
+    # response_model is kept for the OpenAPI schema only
+    return Response(content=_HEALTH_BODY, media_type="application/json")
 
 
 # ============== Prompt Endpoints ==============
 
 @app.get("/prompts", response_model=PromptList)
-def list_prompts(
+async def list_prompts(
+    request: Request,
     collection_id: Optional[str] = None,
     search: Optional[str] = None
 ):
-    prompts = storage.get_all_prompts()
-    
-    # Filter by collection if specified
-    if collection_id:
-        prompts = filter_prompts_by_collection(prompts, collection_id)
-    
-    # Search if query provided
-    if search:
-        prompts = search_prompts(prompts, search)
+    # Any mutation bumps the storage version, so it identifies this listing
+    etag = f'W/"prompts-{storage.version}"'
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
     
-    # Sort by date (newest first)
-    # Note: There might be an issue with the sorting...
-    prompts = sort_prompts_by_date(prompts, descending=True)
+    # Newest first; filtering, search and ordering happen in one pass
+    prompts = storage.list_prompts(collection_id=collection_id, search=search)
+    total = len(prompts) if search else storage.count_prompts(collection_id)
     
-    return PromptList(prompts=prompts, total=len(prompts))
+    # The body is assembled from each prompt's cached JSON, skipping both
+    # response_model validation and per-request serialization;
+    # response_model is kept for the OpenAPI schema
+    body = b'{"prompts":' + storage.dump_prompts(prompts) + b',"total":%d}' % total
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
 
 
 @app.get("/prompts/{prompt_id}", response_model=Prompt)
-def get_prompt(prompt_id: str):
+async def get_prompt(prompt_id: str):
     prompt = storage.get_prompt(prompt_id)
     
     if prompt is None:
@@ -73,7 +117,7 @@ def get_prompt(prompt_id: str):
 
 
 @app.post("/prompts", response_model=Prompt, status_code=201)
-def create_prompt(prompt_data: PromptCreate):
+async def create_prompt(prompt_data: PromptCreate):
     # Validate collection exists if provided
     if prompt_data.collection_id:
         collection = storage.get_collection(prompt_data.collection_id)
@@ -85,7 +129,7 @@ def create_prompt(prompt_data: PromptCreate):
 
 
 @app.put("/prompts/{prompt_id}", response_model=Prompt)
-def update_prompt(prompt_id: str, prompt_data: PromptUpdate):
+async def update_prompt(prompt_id: str, prompt_data: PromptUpdate):
     existing = storage.get_prompt(prompt_id)
     if not existing:
         raise HTTPException(status_code=404, detail="Prompt not found")
@@ -96,20 +140,20 @@ def update_prompt(prompt_id: str, prompt_data: PromptUpdate):
         if not collection:
             raise HTTPException(status_code=400, detail="Collection not found")
     
-    updated_prompt = Prompt(
-        id=existing.id,
-        title=prompt_data.title,
-        content=prompt_data.content,
-        description=prompt_data.description,
-        collection_id=prompt_data.collection_id,
-        created_at=existing.created_at,
-        updated_at=get_current_time()
-    )
+    # PromptUpdate has already validated the new values, so copy instead of
+    # re-running every Prompt validator (model_copy does not validate)
+    updated_prompt = existing.model_copy(update={
+        "title": prompt_data.title,
+        "content": prompt_data.content,
+        "description": prompt_data.description,
+        "collection_id": prompt_data.collection_id,
+        "updated_at": get_current_time(),
+    })
     
     return storage.update_prompt(prompt_id, updated_prompt)
 
 @app.patch("/prompts/{prompt_id}", response_model=Prompt)
-def patch_prompt(prompt_id: str, prompt_data: PromptPatch):
+async def patch_prompt(prompt_id: str, prompt_data: PromptPatch):
     existing = storage.get_prompt(prompt_id)
     if not existing:
         raise HTTPException(status_code=404, detail="Prompt not found")
@@ -120,27 +164,24 @@ def patch_prompt(prompt_id: str, prompt_data: PromptPatch):
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields provided for update")
 
+    # PromptPatch accepts explicit nulls, but title and content are required
+    for field in ("title", "content"):
+        if field in update_data and update_data[field] is None:
+            raise HTTPException(status_code=400, detail=f"{field} cannot be null")
+
     # Validate collection if being updated
     if "collection_id" in update_data and update_data["collection_id"]:
         collection = storage.get_collection(update_data["collection_id"])
         if not collection:
             raise HTTPException(status_code=400, detail="Collection not found")
 
-    # Merge existing data with updates
-    updated_prompt = Prompt(
-        id=existing.id,
-        title=update_data.get("title", existing.title),
-        content=update_data.get("content", existing.content),
-        description=update_data.get("description", existing.description),
-        collection_id=update_data.get("collection_id", existing.collection_id),
-        created_at=existing.created_at,
-        updated_at=get_current_time(),
-    )
+    # Merge existing data with updates; PromptPatch has validated them
+    updated_prompt = existing.model_copy(update={**update_data, "updated_at": get_current_time()})
 
     return storage.update_prompt(prompt_id, updated_prompt)
 
 @app.delete("/prompts/{prompt_id}", status_code=204)
-def delete_prompt(prompt_id: str):
+async def delete_prompt(prompt_id: str):
     if not storage.delete_prompt(prompt_id):
         raise HTTPException(status_code=404, detail="Prompt not found")
     return None
@@ -149,13 +190,20 @@ def delete_prompt(prompt_id: str):
 # ============== Collection Endpoints ==============
 
 @app.get("/collections", response_model=CollectionList)
-def list_collections():
+async def list_collections(request: Request):
+    etag = f'W/"collections-{storage.version}"'
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    
     collections = storage.get_all_collections()
-    return CollectionList(collections=collections, total=len(collections))
+    return ORJSONResponse({
+        "collections": [c.model_dump(mode="json") for c in collections],
+        "total": storage.count_collections(),
+    }, headers={"ETag": etag})
 
 
 @app.get("/collections/{collection_id}", response_model=Collection)
-def get_collection(collection_id: str):
+async def get_collection(collection_id: str):
     collection = storage.get_collection(collection_id)
     if not collection:
         raise HTTPException(status_code=404, detail="Collection not found")
@@ -163,24 +211,16 @@ def get_collection(collection_id: str):
 
 
 @app.post("/collections", response_model=Collection, status_code=201)
-def create_collection(collection_data: CollectionCreate):
+async def create_collection(collection_data: CollectionCreate):
     collection = Collection(**collection_data.model_dump())
     return storage.create_collection(collection)
 
 
 @app.delete("/collections/{collection_id}", status_code=204)
-def delete_collection(collection_id: str):
-    # Ensure the collection exists and can be deleted
-    if not storage.delete_collection(collection_id):
+async def delete_collection(collection_id: str):
+    # Deletes the collection and detaches its prompts in one storage call
+    if not storage.clear_collection(collection_id):
         raise HTTPException(status_code=404, detail="Collection not found")
     
-    # Retrieve all prompts with this collection_id
-    prompts = storage.get_prompts_by_collection(collection_id)
-    
-    # Set collection_id to None for each retrieved prompt
-    for prompt in prompts:
-        prompt.collection_id = None
-        storage.update_prompt(prompt.id, prompt)
-    
     return None
 
@@ -1,8 +1,9 @@
 """Pydantic models for PromptLab"""
 
+from dataclasses import dataclass
 from datetime import datetime
 from typing import Optional, List
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from uuid import uuid4
 
 
@@ -46,8 +47,53 @@ class Prompt(PromptBase):
     created_at: datetime = Field(default_factory=get_current_time)
     updated_at: datetime = Field(default_factory=get_current_time)
 
-    class Config:
-        from_attributes = True
+    # Frozen: Prompt is the API-facing DTO (storage holds PromptRecord), so
+    # instances handed out are immutable and hashable; edits go via model_copy
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+
+# ============== Storage Records ==============
+
+@dataclass(slots=True)
+class PromptRecord:
+    """In-memory form of a stored prompt.
+    
+    Storage keeps these slotted records instead of Prompt models so that
+    list, filter and search loops read plain attributes; they are converted
+    to Prompt only at the API boundary. Fields mirror Prompt, in the same
+    order, so a record serializes to the same JSON.
+    """
+    title: str
+    content: str
+    description: Optional[str]
+    collection_id: Optional[str]
+    id: str
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def from_prompt(cls, prompt: Prompt) -> "PromptRecord":
+        return cls(
+            title=prompt.title,
+            content=prompt.content,
+            description=prompt.description,
+            collection_id=prompt.collection_id,
+            id=prompt.id,
+            created_at=prompt.created_at,
+            updated_at=prompt.updated_at,
+        )
+
+    def to_prompt(self) -> Prompt:
+        # Records only ever hold validated data, so skip validation
+        return Prompt.model_construct(
+            title=self.title,
+            content=self.content,
+            description=self.description,
+            collection_id=self.collection_id,
+            id=self.id,
+            created_at=self.created_at,
+            updated_at=self.updated_at,
+        )
 
 
 # ============== Collection Models ==============
@@ -65,8 +111,9 @@ class Collection(CollectionBase):
     id: str = Field(default_factory=generate_id)
     created_at: datetime = Field(default_factory=get_current_time)
 
-    class Config:
-        from_attributes = True
+    # Frozen: collections are never edited after creation, so instances are
+    # immutable and hashable
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 
 # ============== Response Models ==============
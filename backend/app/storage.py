@@ -2,45 +2,240 @@
 
 This module provides simple in-memory storage for prompts and collections.
 In a production environment, this would be replaced with a database.
+
+Prompts are held as PromptRecord values. Single-prompt operations take and
+return Prompt models; list operations return the records themselves, which
+callers serialize or convert at the API boundary.
 """
 
-from typing import Dict, List, Optional
-from app.models import Prompt, Collection
+import re
+from itertools import count
+from bisect import bisect_right
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+import orjson
+
+from app.models import Prompt, PromptRecord, Collection
+from app.utils import build_search_text
+
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Query words shorter than this match too many tokens to narrow a search
+_MIN_INDEXED_WORD = 3
+
+# An id set covering more than 1/_DENSE_FRACTION of all prompts is applied
+# during an in-order storage walk instead of being looked up and sorted
+_DENSE_FRACTION = 4
 
 
 class Storage:
     def __init__(self):
-        self._prompts: Dict[str, Prompt] = {}
+        # Dicts preserve insertion order, so prompts are kept in creation order
+        self._prompts: Dict[str, PromptRecord] = {}
+        self._created_in_order = True
+        # Insertion sequence per prompt; breaks created_at ties so every
+        # listing orders equal timestamps the same way as a storage walk
+        self._seq: Dict[str, int] = {}
+        self._seq_counter = count()
         self._collections: Dict[str, Collection] = {}
+        # Secondary index: collection_id -> ids of the prompts it contains
+        self._prompts_by_collection: Dict[str, Set[str]] = defaultdict(set)
+        # Search cache: prompt_id -> build_search_text(prompt)
+        self._search_text: Dict[str, str] = {}
+        # Inverted index over the search text: token -> prompt ids
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        # NUL-joined vocabulary of the postings, rebuilt lazily after changes
+        self._vocab: Optional[str] = None
+        self._vocab_tokens: List[str] = []
+        self._vocab_starts: List[int] = []
+        # Serialized JSON per prompt, kept in step with the records
+        self._prompt_json: Dict[str, bytes] = {}
+        # Bumped on every mutation; the API uses it as the ETag for list views
+        self._version = 0
     
     # ============== Prompt Operations ==============
     
     def create_prompt(self, prompt: Prompt) -> Prompt:
-        self._prompts[prompt.id] = prompt
+        if self._created_in_order and self._prompts:
+            newest = self._prompts[next(reversed(self._prompts))]
+            if prompt.created_at < newest.created_at:
+                # Clock went backwards; insertion order no longer matches created_at
+                self._created_in_order = False
+        record = PromptRecord.from_prompt(prompt)
+        self._prompts[prompt.id] = record
+        self._seq[prompt.id] = next(self._seq_counter)
+        self._prompt_json[prompt.id] = orjson.dumps(record)
+        self._index_collection(prompt.id, None, record.collection_id)
+        self._index_search_text(prompt.id, build_search_text(record))
+        self._bump()
         return prompt
     
     def get_prompt(self, prompt_id: str) -> Optional[Prompt]:
-        return self._prompts.get(prompt_id)
+        record = self._prompts.get(prompt_id)
+        return record.to_prompt() if record is not None else None
     
-    def get_all_prompts(self) -> List[Prompt]:
+    def get_all_prompts(self) -> List[PromptRecord]:
+        """Deprecated: copies every record into a new list. Use iter_prompts
+        (or list_prompts for filtered, ordered results) instead."""
         return list(self._prompts.values())
     
+    def iter_prompts(self, descending: bool = False) -> Iterator[PromptRecord]:
+        """Iterate stored prompts in insertion (creation) order without
+        copying them; must be consumed before storage is next modified."""
+        if descending:
+            return reversed(self._prompts.values())
+        return iter(self._prompts.values())
+    
+    def get_all_prompts_sorted(self, descending: bool = True) -> List[PromptRecord]:
+        """Return all prompts ordered by creation date.
+        
+        Prompts are stored in creation order, so this is a plain walk over
+        storage unless a prompt was ever inserted out of order.
+        """
+        if not self._created_in_order:
+            return sorted(self._prompts.values(), key=self._order_key, reverse=descending)
+        return list(self.iter_prompts(descending))
+    
+    def count_prompts(self, collection_id: Optional[str] = None) -> int:
+        if collection_id:
+            return len(self._prompts_by_collection.get(collection_id, ()))
+        return len(self._prompts)
+    
     def update_prompt(self, prompt_id: str, prompt: Prompt) -> Optional[Prompt]:
-        if prompt_id not in self._prompts:
+        existing = self._prompts.get(prompt_id)
+        if existing is None:
             return None
-        self._prompts[prompt_id] = prompt
+        record = PromptRecord.from_prompt(prompt)
+        self._prompts[prompt_id] = record
+        self._prompt_json[prompt_id] = orjson.dumps(record)
+        self._index_collection(prompt_id, existing.collection_id, record.collection_id)
+        self._index_search_text(prompt_id, build_search_text(record))
+        self._bump()
         return prompt
     
     def delete_prompt(self, prompt_id: str) -> bool:
-        if prompt_id in self._prompts:
-            del self._prompts[prompt_id]
-            return True
-        return False
+        prompt = self._prompts.pop(prompt_id, None)
+        if prompt is None:
+            return False
+        del self._prompt_json[prompt_id]
+        del self._seq[prompt_id]
+        self._index_collection(prompt_id, prompt.collection_id, None)
+        self._index_search_text(prompt_id, None)
+        self._bump()
+        return True
+    
+    def list_prompts(
+        self, collection_id: Optional[str] = None, search: Optional[str] = None
+    ) -> List[PromptRecord]:
+        """Return prompts newest first, optionally limited to a collection
+        and/or matching a search query.
+        
+        Collection membership and search candidates are resolved from the
+        indexes, and filtering and ordering then happen in a single pass
+        that builds only the result list.
+        """
+        prompts = self._prompts
+        ids: Optional[Set[str]] = None
+        if collection_id:
+            ids = self._prompts_by_collection.get(collection_id, set())
+        
+        query_lower = search.lower() if search else None
+        if query_lower is not None:
+            if "\x00" in query_lower:
+                # Would otherwise match across the title/description separator
+                return []
+            candidates = self._search_candidates(query_lower)
+            if candidates is not None:
+                ids = candidates if ids is None else ids & candidates
+        
+        # Small id sets are looked up and sorted; large ones are cheaper to
+        # apply as a membership test on an in-order walk of storage
+        walk = ids is None or len(ids) * _DENSE_FRACTION > len(prompts)
+        if walk:
+            records = self.iter_prompts(descending=True)
+            if ids is not None:
+                records = (r for r in records if r.id in ids)
+        else:
+            records = (prompts[pid] for pid in ids)
+        if query_lower is not None:
+            text = self._search_text
+            records = (r for r in records if query_lower in text[r.id])
+        
+        # Storage order is creation order, so a walk needs no sort
+        if walk and self._created_in_order:
+            return list(records)
+        return sorted(records, key=self._order_key, reverse=True)
+    
+    def _order_key(self, record: PromptRecord):
+        """Sort key matching storage order: created_at, then insertion."""
+        return (record.created_at, self._seq[record.id])
+    
+    def dump_prompts(self, records: Iterable[PromptRecord]) -> bytes:
+        """Serialize stored prompts as a JSON array from the per-prompt cache."""
+        cache = self._prompt_json
+        return b"[" + b",".join([cache[r.id] for r in records]) + b"]"
+    
+    def _search_candidates(self, query_lower: str) -> Optional[Set[str]]:
+        """Ids of prompts that could contain query_lower, or None if the
+        index can't usefully narrow the search.
+        
+        A substring match means every word in the query appears inside some
+        token of the prompt, so each query word is looked up against the
+        whole vocabulary rather than only as an exact token. Words shorter
+        than _MIN_INDEXED_WORD, or matching more than 1/_DENSE_FRACTION of
+        all prompts, are skipped: they narrow little, and the unordered
+        candidate set would then cost more than scanning in storage order.
+        """
+        words = [w for w in set(_TOKEN_RE.findall(query_lower)) if len(w) >= _MIN_INDEXED_WORD]
+        limit = len(self._prompts) // _DENSE_FRACTION
+        candidates: Optional[Set[str]] = None
+        for word in words:
+            matches: Set[str] = set()
+            for token in self._tokens_containing(word):
+                matches |= self._postings[token]
+                if len(matches) > limit:
+                    break
+            if len(matches) > limit:
+                continue
+            candidates = matches if candidates is None else candidates & matches
+            if not candidates:
+                break
+        return candidates
+    
+    def _tokens_containing(self, word: str) -> List[str]:
+        """Indexed tokens that contain word as a substring.
+        
+        The vocabulary is scanned with str.find over one NUL-joined buffer,
+        so the scan runs in C; a hit is mapped back to its token by offset.
+        Words never contain NUL, so a hit can't straddle two tokens.
+        """
+        if self._vocab is None:
+            self._vocab_tokens = list(self._postings)
+            self._vocab = "\x00".join(self._vocab_tokens)
+            starts, offset = [], 0
+            for token in self._vocab_tokens:
+                starts.append(offset)
+                offset += len(token) + 1
+            self._vocab_starts = starts
+        vocab, starts, tokens = self._vocab, self._vocab_starts, self._vocab_tokens
+        found = []
+        i = vocab.find(word)
+        while i != -1:
+            k = bisect_right(starts, i) - 1
+            found.append(tokens[k])
+            if k + 1 == len(starts):
+                break
+            # Skip to the next token; each token is reported once
+            i = vocab.find(word, starts[k + 1])
+        return found
     
     # ============== Collection Operations ==============
     
     def create_collection(self, collection: Collection) -> Collection:
         self._collections[collection.id] = collection
+        self._bump()
         return collection
     
     def get_collection(self, collection_id: str) -> Optional[Collection]:
@@ -49,20 +244,92 @@ class Storage:
     def get_all_collections(self) -> List[Collection]:
         return list(self._collections.values())
     
+    def count_collections(self) -> int:
+        return len(self._collections)
+    
     def delete_collection(self, collection_id: str) -> bool:
-        if collection_id in self._collections:
-            del self._collections[collection_id]
-            return True
-        return False
+        """Alias of clear_collection: a collection is never deleted without
+        detaching its prompts."""
+        return self.clear_collection(collection_id)
+    
+    def get_prompts_by_collection(self, collection_id: str) -> List[PromptRecord]:
+        return [self._prompts[pid] for pid in self._prompts_by_collection.get(collection_id, ())]
+    
+    def clear_collection(self, collection_id: str) -> bool:
+        """Delete a collection and detach all of its prompts.
+        
+        The collection's bucket is popped from the index as a whole and its
+        records are updated in place, so no per-prompt index maintenance or
+        record rebuild is needed.
+        """
+        if self._collections.pop(collection_id, None) is None:
+            return False
+        prompt_ids = self._prompts_by_collection.pop(collection_id, ())
+        prompts, prompt_json = self._prompts, self._prompt_json
+        for pid in prompt_ids:
+            record = prompts[pid]
+            record.collection_id = None
+            prompt_json[pid] = orjson.dumps(record)
+        self._bump()
+        return True
+    
+    # ============== Versioning ==============
+    
+    @property
+    def version(self) -> int:
+        """Counter that changes whenever any prompt or collection changes."""
+        return self._version
+    
+    def _bump(self):
+        self._version += 1
+    
+    # ============== Indexing ==============
+    
+    def _index_collection(self, prompt_id: str, old_id: Optional[str], new_id: Optional[str]):
+        """Move a prompt between collection index buckets."""
+        if old_id == new_id:
+            return
+        if old_id:
+            members = self._prompts_by_collection.get(old_id)
+            if members is not None:
+                members.discard(prompt_id)
+                if not members:
+                    del self._prompts_by_collection[old_id]
+        if new_id:
+            self._prompts_by_collection[new_id].add(prompt_id)
     
-    def get_prompts_by_collection(self, collection_id: str) -> List[Prompt]:
-        return [p for p in self._prompts.values() if p.collection_id == collection_id]
+    def _index_search_text(self, prompt_id: str, text: Optional[str]):
+        """Replace a prompt's search text and its token postings."""
+        old_text = self._search_text.pop(prompt_id, None)
+        old_tokens = set(_TOKEN_RE.findall(old_text)) if old_text else set()
+        new_tokens = set(_TOKEN_RE.findall(text)) if text else set()
+        for token in old_tokens - new_tokens:
+            ids = self._postings[token]
+            ids.discard(prompt_id)
+            if not ids:
+                del self._postings[token]
+                self._vocab = None
+        for token in new_tokens - old_tokens:
+            if token not in self._postings:
+                self._vocab = None
+            self._postings[token].add(prompt_id)
+        if text is not None:
+            self._search_text[prompt_id] = text
     
     # ============== Utility ==============
     
     def clear(self):
         self._prompts.clear()
+        self._created_in_order = True
+        self._seq.clear()
         self._collections.clear()
+        self._prompts_by_collection.clear()
+        self._search_text.clear()
+        self._postings.clear()
+        self._vocab = None
+        self._prompt_json.clear()
+        # Bump rather than reset so ETags issued before the clear stay stale
+        self._bump()
 
 
 # Global storage instance
@@ -1,26 +1,17 @@
 """Utility functions for PromptLab"""
 
+import re
 from typing import List
-from app.models import Prompt
+from app.models import PromptRecord
 
 
-def sort_prompts_by_date(prompts: List[Prompt], descending: bool = True) -> List[Prompt]:
-    """Sort prompts by creation date.
-    """
-    return sorted(prompts, key=lambda p: p.created_at, reverse=descending)
-
-
-def filter_prompts_by_collection(prompts: List[Prompt], collection_id: str) -> List[Prompt]:
-    return [p for p in prompts if p.collection_id == collection_id]
+_VARIABLE_RE = re.compile(r'\{\{(\w+)\}\}')
 
 
-def search_prompts(prompts: List[Prompt], query: str) -> List[Prompt]:
-    query_lower = query.lower()
-    return [
-        p for p in prompts 
-        if query_lower in p.title.lower() or 
-           (p.description and query_lower in p.description.lower())
-    ]
+def build_search_text(prompt: PromptRecord) -> str:
+    """Lowercased title and description, NUL-separated; Storage.list_prompts
+    rejects queries containing NUL so nothing matches across the boundary."""
+    return (prompt.title + "\x00" + (prompt.description or "")).lower()
 
 
 def validate_prompt_content(content: str) -> bool:
@@ -31,7 +22,7 @@ def validate_prompt_content(content: str) -> bool:
     - Not be just whitespace
     - Be at least 10 characters
     """
-    if not content or not content.strip():
+    if not content:
         return False
     return len(content.strip()) >= 10
 
@@ -41,7 +32,5 @@ def extract_variables(content: str) -> List[str]:
     
     Variables are in the format {{variable_name}}
     """
-    import re
-    pattern = r'\{\{(\w+)\}\}'
-    return re.findall(pattern, content)
+    return _VARIABLE_RE.findall(content)
 
@@ -1,10 +1,23 @@
 """PromptLab API Server
 
 Run with: python main.py
+
+uvicorn picks up uvloop and httptools automatically when they are installed.
+Set PROMPTLAB_WORKERS to run more than one worker process (reload is then
+disabled). Storage is in-memory and per-process, so every worker sees its
+own data; only use multiple workers once storage is shared.
 """
 
+import os
+
 import uvicorn
-from app.api import app
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
+    workers = int(os.getenv("PROMPTLAB_WORKERS", "1"))
+    uvicorn.run(
+        "app.api:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=workers == 1,
+        workers=workers,
+    )
@@ -104,6 +104,121 @@ class TestPrompts:
         assert data["title"] == "Updated Title"
         assert data["updated_at"] != original_updated_at 
     
+    def test_list_prompts_filter_by_collection(self, client: TestClient, sample_prompt_data, sample_collection_data):
+        col_a = client.post("/collections", json=sample_collection_data).json()["id"]
+        col_b = client.post("/collections", json={"name": "Other"}).json()["id"]
+        
+        # The collection is a small slice of storage, so it is served from
+        # the collection index rather than a walk over every prompt
+        in_a = []
+        for i in range(12):
+            data = {**sample_prompt_data, "title": f"Prompt {i}"}
+            if i % 4 == 1:
+                data["collection_id"] = col_a
+            prompt_id = client.post("/prompts", json=data).json()["id"]
+            if i % 4 == 1:
+                in_a.append(prompt_id)
+        
+        data = client.get("/prompts", params={"collection_id": col_a}).json()
+        assert [p["id"] for p in data["prompts"]] == in_a[::-1]
+        assert data["total"] == 3
+        
+        # Moving a prompt updates the collection index
+        moved_id = in_a[1]
+        client.patch(f"/prompts/{moved_id}", json={"collection_id": col_b})
+        data = client.get("/prompts", params={"collection_id": col_a}).json()
+        assert [p["id"] for p in data["prompts"]] == [in_a[2], in_a[0]]
+        assert data["total"] == 2
+        data = client.get("/prompts", params={"collection_id": col_b}).json()
+        assert [p["id"] for p in data["prompts"]] == [moved_id]
+        assert data["total"] == 1
+        
+        # Deleting the prompt removes it from the index
+        client.delete(f"/prompts/{moved_id}")
+        data = client.get("/prompts", params={"collection_id": col_b}).json()
+        assert data["prompts"] == []
+        assert data["total"] == 0
+    
+    def test_search_prompts(self, client: TestClient, sample_prompt_data):
+        prompt_id = client.post("/prompts", json=sample_prompt_data).json()["id"]
+        client.post("/prompts", json={"title": "Summarizer", "content": "Summarize {{text}}"})
+        
+        # Case-insensitive substring match on title or description
+        for query in ["code", "REVIEW", "ai code"]:
+            data = client.get("/prompts", params={"search": query}).json()
+            assert [p["id"] for p in data["prompts"]] == [prompt_id]
+        
+        # Content is not searched
+        assert client.get("/prompts", params={"search": "feedback"}).json()["total"] == 0
+        
+        # Search reflects updates
+        client.patch(f"/prompts/{prompt_id}", json={"title": "Bug Finder", "description": None})
+        assert client.get("/prompts", params={"search": "review"}).json()["total"] == 0
+        assert client.get("/prompts", params={"search": "bug"}).json()["total"] == 1
+        
+        # A query can't match across the title/description boundary
+        assert client.get("/prompts", params={"search": "finder\x00"}).json()["total"] == 0
+    
+    def test_search_selective_words_use_index(self, client: TestClient):
+        # Enough prompts that a selective word (<= 1/4 of them) narrows via the
+        # token index rather than falling back to a full scan
+        for i in range(8):
+            client.post("/prompts", json={"title": f"Filler {i}", "content": "Some prompt content"})
+        review_id = client.post("/prompts", json={
+            "title": "Code Review", "content": "Review {{code}}"
+        }).json()["id"]
+        preview_id = client.post("/prompts", json={
+            "title": "Page Builder", "content": "Build a page", "description": "Preview layouts"
+        }).json()["id"]
+        client.post("/prompts", json={"title": "Summarizer", "content": "Summarize {{text}}"})
+        
+        # A query word inside longer tokens ("review", "preview")
+        data = client.get("/prompts", params={"search": "view"}).json()
+        assert [p["id"] for p in data["prompts"]] == [preview_id, review_id]
+        assert data["total"] == 2
+        
+        # Words hitting different tokens must all match, as one substring
+        data = client.get("/prompts", params={"search": "code rev"}).json()
+        assert [p["id"] for p in data["prompts"]] == [review_id]
+        assert client.get("/prompts", params={"search": "rev code"}).json()["total"] == 0
+    
+    def test_search_short_query_keeps_order(self, client: TestClient):
+        # One-letter words bypass the token index; results stay newest first
+        titles = ["Alpha", "Beta", "Gamma", "Delta"]
+        for title in titles:
+            client.post("/prompts", json={"title": title, "content": "Some prompt content"})
+        
+        data = client.get("/prompts", params={"search": "e"}).json()
+        assert [p["title"] for p in data["prompts"]] == ["Delta", "Beta"]
+        assert data["total"] == 2
+        
+        data = client.get("/prompts", params={"search": "a"}).json()
+        assert [p["title"] for p in data["prompts"]] == ["Delta", "Gamma", "Beta", "Alpha"]
+    
+    def test_list_prompts_etag(self, client: TestClient, sample_prompt_data):
+        client.post("/prompts", json=sample_prompt_data)
+        response = client.get("/prompts")
+        etag = response.headers["etag"]
+        
+        # Unchanged storage: conditional request is answered with 304
+        cached = client.get("/prompts", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        
+        # If-None-Match uses weak comparison: the W/ prefix doesn't matter
+        assert etag.startswith("W/")
+        strong = client.get("/prompts", headers={"If-None-Match": etag[2:]})
+        assert strong.status_code == 304
+        listed = client.get("/prompts", headers={"If-None-Match": f'"other", {etag}'})
+        assert listed.status_code == 304
+        
+        # Any write invalidates the ETag
+        client.post("/prompts", json=sample_prompt_data)
+        response = client.get("/prompts", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["total"] == 2
+        assert response.headers["etag"] != etag
+    
     def test_sorting_order(self, client: TestClient):
         """Test that prompts are sorted newest first.
         
@@ -144,6 +259,30 @@ class TestCollections:
         data = response.json()
         assert len(data["collections"]) == 1
     
+    def test_list_collections_etag(self, client: TestClient, sample_collection_data):
+        collection_id = client.post("/collections", json=sample_collection_data).json()["id"]
+        etag = client.get("/collections").headers["etag"]
+        
+        # Unchanged storage: conditional request is answered with 304
+        cached = client.get("/collections", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        
+        # Creating a collection invalidates the ETag
+        client.post("/collections", json={"name": "Other"})
+        response = client.get("/collections", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["total"] == 2
+        new_etag = response.headers["etag"]
+        assert new_etag != etag
+        
+        # So does deleting one
+        client.delete(f"/collections/{collection_id}")
+        response = client.get("/collections", headers={"If-None-Match": new_etag})
+        assert response.status_code == 200
+        assert response.json()["total"] == 1
+        assert response.headers["etag"] != new_etag
+    
     def test_get_collection_not_found(self, client: TestClient):
         response = client.get("/collections/nonexistent-id")
         assert response.status_code == 404
@@ -168,6 +307,9 @@ class TestCollections:
         if prompts:
             # Prompt exists, check collection_id
             assert prompts[0]["collection_id"] is None
+        
+        # The prompt is no longer listed under the deleted collection
+        assert client.get("/prompts", params={"collection_id": collection_id}).json()["total"] == 0
     
 
     def test_partial_update_prompt(self, client: TestClient, sample_prompt_data):
@@ -196,3 +338,8 @@ class TestCollections:
         assert response.status_code == 400
         assert response.json()["detail"] == "No fields provided for update"
 
+        # Required fields cannot be nulled out
+        response = client.patch(f"/prompts/{prompt_id}", json={"title": None})
+        assert response.status_code == 400
+        assert client.get(f"/prompts/{prompt_id}").json()["title"] == "Updated Title"
+
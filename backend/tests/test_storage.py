@@ -0,0 +1,82 @@
+"""Storage tests for PromptLab
+
+These tests exercise Storage directly, for ordering cases (such as equal
+timestamps) that can't be set up through the API.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.models import Collection, Prompt
+from app.storage import Storage
+
+
+@pytest.fixture
+def store():
+    """A fresh storage instance, separate from the app's global one."""
+    return Storage()
+
+
+class TestListPrompts:
+    """Tests for Storage.list_prompts ordering."""
+
+    def test_small_subset_sorted_newest_first_with_ties(self, store: Storage):
+        # Every fourth prompt is in the collection: small enough to be looked
+        # up from the index and sorted rather than filtered during a walk
+        earliest, early, late = datetime(2023, 1, 1), datetime(2024, 1, 1), datetime(2024, 1, 2)
+        ids = []
+        for i in range(32):
+            if i == 28:
+                created_at = earliest  # inserted late, but oldest
+            else:
+                created_at = early if i < 16 else late
+            prompt = Prompt(
+                title=f"Prompt {i}",
+                content="Some prompt content",
+                collection_id="picked" if i % 4 == 0 else None,
+                created_at=created_at,
+            )
+            ids.append(store.create_prompt(prompt).id)
+
+        # Newest first; equal timestamps come back latest-inserted first,
+        # exactly as in the unfiltered listing
+        expected = [i for i in range(31, -1, -1) if i != 28] + [28]
+        assert [r.id for r in store.list_prompts()] == [ids[i] for i in expected]
+        listed = store.list_prompts(collection_id="picked")
+        assert [r.id for r in listed] == [ids[i] for i in expected if i % 4 == 0]
+
+    def test_clock_going_backwards_still_newest_first(self, store: Storage):
+        first = store.create_prompt(Prompt(
+            title="First", content="Some prompt content", created_at=datetime(2024, 1, 2)
+        ))
+        second = store.create_prompt(Prompt(
+            title="Second", content="Some prompt content", created_at=datetime(2024, 1, 3)
+        ))
+        # Inserted last, but stamped before everything else
+        skewed = store.create_prompt(Prompt(
+            title="Skewed", content="Some prompt content", created_at=datetime(2024, 1, 1)
+        ))
+
+        expected = [second.id, first.id, skewed.id]
+        assert [r.id for r in store.list_prompts()] == expected
+        assert [r.id for r in store.get_all_prompts_sorted()] == expected
+        assert [r.id for r in store.get_all_prompts_sorted(descending=False)] == expected[::-1]
+
+
+class TestDeleteCollection:
+    """Tests for collection deletion in Storage."""
+
+    def test_delete_collection_detaches_prompts(self, store: Storage):
+        collection = store.create_collection(Collection(name="Development"))
+        prompt = store.create_prompt(Prompt(
+            title="Prompt", content="Some prompt content", collection_id=collection.id
+        ))
+
+        assert store.delete_collection(collection.id)
+        assert store.get_collection(collection.id) is None
+        assert store.get_prompt(prompt.id).collection_id is None
+        assert store.list_prompts(collection_id=collection.id) == []
+        assert store.count_prompts(collection.id) == 0
+        assert b'"collection_id":null' in store.dump_prompts(store.list_prompts())
+        assert not store.delete_collection(collection.id)